@@ -1,8 +1,18 @@
 from os import (
     path as os_path,
-    makedirs
+    makedirs,
+    cpu_count,
+    replace,
+    remove,
+    fdopen,
+    open as os_open,
+    O_WRONLY,
+    O_CREAT,
+    O_EXCL,
+    stat as os_stat
 )
-from tempfile import NamedTemporaryFile
+from secrets import token_hex
+from contextlib import contextmanager
 from rdkit.Chem import (
     MolFromSmiles,
     MolFromInchi,
@@ -10,20 +20,40 @@ from rdkit.Chem import (
     MolToInchi,
     MolToInchiKey,
 )
-from csv import (
-    DictReader as csv_DictReader,
-    reader as csv_reader
-)
+from csv import reader as csv_reader
 from json import (
     dump as json_dump,
     load as json_load
 )
-from gzip       import open as gzip_open
-from re         import findall as re_findall
+from pickle import (
+    dump as pickle_dump,
+    Unpickler,
+    UnpicklingError,
+    HIGHEST_PROTOCOL as PICKLE_PROTOCOL
+)
+from gzip       import (
+    open as gzip_open,
+    GzipFile
+)
+from io         import TextIOWrapper
+from re         import compile as re_compile
 # from time       import time as time_time
-from requests   import exceptions as r_exceptions
+from requests   import Session
+from requests.adapters import HTTPAdapter
 from hashlib    import sha512
-from pathlib    import Path
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    wait,
+    FIRST_COMPLETED
+)
+from collections import defaultdict
+from sys        import intern
+from threading  import Lock
+from functools  import (
+    lru_cache,
+    partial
+)
 from colored    import (
     attr as c_attr,
 )
@@ -35,21 +65,91 @@ from logging import (
 from typing import (
     List,
     Tuple,
-    Dict
+    Dict,
+    Set
 )
 from brs_utils  import (
     print_start,
     print_progress,
     print_end,
-    download,
     check_sha
 )
 
 from .Args import DEFAULTS
 
+try:
+    # Parallel gzip decompression (optional)
+    from rapidgzip import open as rapidgzip_open
+except ImportError:
+    rapidgzip_open = None
+try:
+    # SIMD gzip decompression in a background thread (optional)
+    from isal.igzip_threaded import open as igzip_threaded_open
+    # SIMD gzip compression (optional)
+    from isal.igzip import GzipFile as igzip_GzipFile
+except ImportError:
+    igzip_threaded_open = igzip_GzipFile = None
+try:
+    # Fast JSON (de)serialization (optional)
+    from orjson import (
+        dumps as orjson_dumps,
+        loads as orjson_loads,
+        OPT_NON_STR_KEYS
+    )
+except ImportError:
+    orjson_dumps = orjson_loads = None
+try:
+    # Hash a file from C, without Python-level reads (Python >= 3.11)
+    from hashlib import file_digest
+except ImportError:
+    file_digest = None
+
 
 HERE = os_path.dirname(os_path.abspath( __file__ ))
 DATA_PATH = os_path.join(HERE, 'data')
+# Max number of cache files downloaded at the same time
+DOWNLOAD_MAX_WORKERS = 8
+# Max number of retries of a failed connection
+DOWNLOAD_MAX_RETRIES = 3
+# Max number of cache files generated at the same time
+GENERATE_MAX_WORKERS = 4
+# Max number of processes converting depictions within a cache generation
+# step, steps running in parallel share the cores instead of each one
+# starting a process per core
+DEPICTION_MAX_WORKERS = max(1, (cpu_count() or 1) // GENERATE_MAX_WORKERS)
+
+# gzip compression level of generated cache files
+# (fastest one, decompression speed does not depend on it)
+CACHE_COMPRESS_LEVEL = 1
+
+# Size of the blocks read to compute file fingerprints
+HASH_CHUNK_SIZE = 1 << 20
+
+# Extension of the binary copy kept next to each loaded cache file
+PICKLE_EXT = '.pickle'
+# File recording the cache files whose fingerprint has been checked
+VERIFIED_EXT = '.verified.json'
+# Extension of the file recording the inputs a cache file was generated from
+INPUTS_SIGNATURE_EXT = '.inputs.json'
+
+# Max number of memoized depiction conversions
+DEPICTION_CACHE_SIZE = 200000
+# Number of depictions sent at once to each conversion process
+DEPICTION_CHUNK_SIZE = 256
+
+# Species of one side of a reaction equation: (stoichio coeff, compound ID)
+EQUATION_SPECIES_PATTERN = re_compile(
+    r'(\(n-1\)|\d+|4n|3n|2n|n|\(n\)|\(N\)|\(2n\)|\(x\)|N|m|q|\(n\-2\)|\d+\.\d+) ([\w\d]+)@\w+'
+)
+# Stoichio coeffs rescued to fixed integer values
+DEFAULT_STOICHIO_RESCUE = {
+    '4n': 4, '3n': 3, '2n': 2, 'n': 1,
+    '(n)': 1, '(N)': 1, '(2n)': 2, '(x)': 1,
+    'N': 1, 'm': 1, 'q': 1,
+    '0.01': 1, '0.1': 1, '0.5': 1, '1.5': 1,
+    '0.02': 1, '0.2': 1,
+    '(n-1)': 0, '(n-2)': -1
+}
 
 
 class FileCorruptedError(Exception):
@@ -77,6 +177,10 @@ class rrCache:
     with open(os_path.join(DATA_PATH, 'cache.json'), 'r') as f:
         __cache = json_load(f)
     __attributes_list = list(__cache.keys())
+    # attr: cache filename
+    __cache_filenames = {
+        attr: val['file']['name'] for attr, val in __cache.items()
+    }
 
     ## Cache constructor
     def __init__(
@@ -84,7 +188,8 @@ class rrCache:
         attrs: List = DEFAULTS['attrs'],
         cache_dir: str = DEFAULTS['cache_dir'],
         mnx_version: str = DEFAULTS['mnx_version'],
-        logger: Logger = getLogger(__name__)
+        logger: Logger = getLogger(__name__),
+        pickle_copy: bool = False
     ) -> 'rrCache':
 
         self.logger = logger
@@ -103,9 +208,28 @@ class rrCache:
             )
         else:
             self.__cache_dir = cache_dir
+        # attr: full path to the cache file
+        self.__cache_files = {
+            attr: os_path.join(self.__cache_dir, filename)
+            for attr, filename in rrCache.__cache_filenames.items()
+        }
+        # attr: data loaded in memory (None until first accessed)
+        self.__data = {}
+        self.__locks = {attr: Lock() for attr in self.__cache_files}
+        # Keep a binary copy of loaded cache files (see _load_cache_from_file())
+        self.__pickle_copy = pickle_copy
         self.load(attrs)
 
 
+    ## Method to load attributes
+    #
+    #  Cache files of 'attrs' are downloaded if missing or corrupted, but
+    #  their content is only loaded in memory on the first get() of each
+    #  attribute. A cache file that cannot be read at that time (removed or
+    #  damaged since) makes that get() raise, not load().
+    #
+    #  @param self Object pointer
+    #  @param attrs Attributes to load (None: none, []: all)
     def load(self, attrs: List = DEFAULTS['attrs']):
 
         if attrs is None:
@@ -120,7 +244,7 @@ class rrCache:
                 self.__attributes_list = attrs
 
         for attr in self.__attributes_list:
-            setattr(self, '__'+attr, None)
+            self.__data[attr] = None
 
         rrCache._check_or_download_cache_to_disk(
             self.__cache_dir,
@@ -128,13 +252,7 @@ class rrCache:
             self.logger
         )
 
-        try:
-            self._check_or_load_cache()
-        except (r_exceptions.RequestException,
-                r_exceptions.InvalidSchema,
-                r_exceptions.ConnectionError):
-            rrCache.generate_cache(self.__cache_dir)
-            self._check_or_load_cache()
+        self._check_or_load_cache()
 
 
     @staticmethod
@@ -148,54 +266,210 @@ class rrCache:
 
         print_start(logger, 'Downloading cache')
 
+        computed_shas = rrCache._fingerprints(
+            [
+                os_path.join(cache_dir, rrCache.__cache_filenames[attr])
+                for attr in attributes_list
+            ],
+            logger
+        )
+
+        # Files to (re-)download: (url, full_filename, fingerprint)
+        missing = []
         for attr in attributes_list:
             print_progress()
-            filename = rrCache.__cache[attr]['file']['name']
+            filename = rrCache.__cache_filenames[attr]
             full_filename = os_path.join(cache_dir, filename)
 
-            try:
-                if os_path.exists(full_filename):
-                    fingerprint = rrCache.__cache[attr]['file']['fingerprint']
-                    if check_sha(
+            fingerprint = rrCache.__cache[attr]['file']['fingerprint']
+            computed = computed_shas.get(full_filename)
+            if computed == fingerprint:
+                logger.debug(filename+" already downloaded")
+            else:
+                if computed is not None:  # sha not ok
+                    logger.debug(
+                        '\nfilename: ' + filename
+                    + '\nlocation: ' + cache_dir
+                    + '\nsha (computed): ' + computed
+                    + '\nsha (expected): ' + fingerprint
+                    )
+                missing.append(
+                    (
+                        rrCache.__cache[attr]['file']['url']+filename,
                         full_filename,
                         fingerprint
-                    ):
-                        logger.debug(filename+" already downloaded")
-                    else:  # sha not ok
-                        logger.debug(
-                            '\nfilename: ' + filename
-                        + '\nlocation: ' + cache_dir
-                        + '\nsha (computed): ' + sha512(Path(full_filename).read_bytes()).hexdigest()
-                        + '\nsha (expected): ' + fingerprint
-                        )
-                        raise FileNotFoundError
-                else:
-                    raise FileNotFoundError
-
-            except FileNotFoundError:
-                logger.debug("Downloading "+filename+"...")
-                # start_time = time_time()
-                if not os_path.isdir(cache_dir):
-                    makedirs(cache_dir, exist_ok=True)
-                download(
-                    rrCache.__cache[attr]['file']['url']+filename,
-                    full_filename
+                    )
                 )
-                # rrCache.__cache[attr] = True
-                # end_time = time_time()
+
+        if missing:
+            if not os_path.isdir(cache_dir):
+                makedirs(cache_dir, exist_ok=True)
+            # Downloads are network-bound, fetch all missing files concurrently
+            with ThreadPoolExecutor(
+                max_workers=min(len(missing), DOWNLOAD_MAX_WORKERS)
+            ) as executor:
+                futures = []
+                for url, full_filename, fingerprint in missing:
+                    logger.debug("Downloading "+os_path.basename(full_filename)+"...")
+                    futures.append(
+                        executor.submit(
+                            rrCache._download, url, full_filename, fingerprint
+                        )
+                    )
+                # Propagate download errors (FileCorruptedError
+                # if a file is not the expected one) to the caller
+                for (_, full_filename, _), future in zip(missing, futures):
+                    # Fingerprint computed (and checked) while downloading
+                    rrCache._store_fingerprint(full_filename, future.result(), logger)
 
         print_end(logger)
 
+    ## Method to get the fingerprints of files on disk
+    #
+    # The fingerprint of each file is recorded next to it, in
+    # '<file>.verified.json', with the size and modification time
+    # of the file. Fingerprints of files not modified since they
+    # were last computed are read from there instead of being
+    # computed again, the others are computed and recorded.
+    #
+    #  @param filenames Files to fingerprint, missing ones are ignored
+    #  @param logger Logger
+    #  @return SHA-512 by filename
+    @staticmethod
+    def _fingerprints(
+        filenames: List[str],
+        logger: Logger = getLogger(__name__)
+    ) -> Dict:
+        computed_shas = {}
+        to_check = []
+        for full_filename in filenames:
+            try:
+                st = os_stat(full_filename)
+            except OSError:
+                continue
+            verified = rrCache._load_signature(full_filename+VERIFIED_EXT)
+            if (
+                isinstance(verified, list) and len(verified) == 3
+                and verified[:2] == [st.st_size, st.st_mtime_ns]
+            ):
+                computed_shas[full_filename] = verified[2]
+            else:
+                to_check.append(full_filename)
+        # Hashing releases the GIL, fingerprint files on disk concurrently
+        if to_check:
+            with ThreadPoolExecutor() as executor:
+                shas = executor.map(rrCache._sha512sum, to_check)
+                for full_filename, sha in zip(to_check, shas):
+                    computed_shas[full_filename] = sha
+                    rrCache._store_fingerprint(full_filename, sha, logger)
+        return computed_shas
+
+    ## Method to record the fingerprint of a file
+    #
+    #  @param filename Fingerprinted file
+    #  @param sha SHA-512 of 'filename'
+    #  @param logger Logger
+    @staticmethod
+    def _store_fingerprint(
+        filename: str,
+        sha: str,
+        logger: Logger = getLogger(__name__)
+    ) -> None:
+        signature = rrCache._files_signature([filename])
+        if signature is not None:
+            rrCache._store_signature(
+                signature[filename]+[sha],
+                filename+VERIFIED_EXT,
+                logger
+            )
+
+    ## Method to log a warning on its own line
+    #
+    # Progress messages are logged with an empty terminator,
+    # end the line within the message instead of swapping
+    # the (global) StreamHandler terminator for each warning
+    #
+    #  @param logger Logger to log into
+    #  @param msg Warning message
+    @staticmethod
+    def _warning(
+        logger: Logger,
+        msg: str
+    ) -> None:
+        if StreamHandler.terminator:
+            logger.warning(msg)
+        else:
+            logger.warning(msg+'\n')
+
+    @staticmethod
+    def _sha512sum(filename: str) -> str:
+        """Compute the SHA-512 fingerprint of 'filename' block by block."""
+        if file_digest is not None:
+            with open(filename, 'rb', buffering=0) as f:
+                return file_digest(f, sha512).hexdigest()
+        h = sha512()
+        with open(filename, 'rb', buffering=0) as f:
+            for block in iter(partial(f.read, HASH_CHUNK_SIZE), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def _is_generated(
+        filename: str,
+        attribute: str,
+        inputs: List[str] = ()
+    ) -> bool:
+        """Tell if cache file 'filename' does not need to be generated.
+
+        Files generated from 'inputs' that did
+        not change since are not generated again.
+        """
+        if inputs:
+            signature = rrCache._files_signature(list(inputs)+[filename])
+            if (
+                signature is not None
+                and signature == rrCache._load_signature(filename+INPUTS_SIGNATURE_EXT)
+            ):
+                return True
+        return os_path.exists(filename) and check_sha(
+            filename,
+            rrCache.__cache[attribute]
+        )
+
+    ## Method to get the data of an attribute
+    #
+    #  The cache file of the attribute is loaded in memory on first access,
+    #  once even if several threads get the attribute at the same time. The
+    #  error raised if the file cannot be read (OSError, ValueError...) is
+    #  passed to the caller, and the file is read again by the next call.
+    #
+    #  @param self Object pointer
+    #  @param attr Attribute to get
+    #  @return data of the attribute, None if it has not been loaded
     def get(self, attr: str):
         self.logger.debug(f'Getting attribute: {attr}')
         try:
-            return getattr(self, '__'+attr)
-        except Exception as e:
-            self.logger.error(str(e))
+            data = self.__data[attr]
+        except KeyError as e:
+            self.logger.error(f'Attribute {e} not loaded')
             return None
+        if data is None and attr in self.__locks:
+            # Load the cache file on first access
+            with self.__locks[attr]:
+                data = self.__data[attr]
+                if data is None:
+                    self.logger.debug(f'Loading {attr} in memory')
+                    data = self._load_cache_from_file(
+                        self.__cache_files[attr],
+                        rrCache.__cache[attr]['file']['fingerprint']
+                        if self.__pickle_copy else None,
+                        self.logger
+                    )
+                    self.__data[attr] = data
+        return data
 
     def __hasattr(self, attr: str):
-        return hasattr(self, '__'+attr)
+        return attr in self.__data
 
     def get_compound(self, cid: str):
         return self.__get_object('cid_strc', cid)
@@ -217,9 +491,13 @@ class rrCache:
 
     def __get_object(self, attr: str, id: str):
         try:
-            if not self.__hasattr(attr):
-                self.load(attrs=[attr])
-            return self.get(attr)[id]
+            # Called once per object, skip get() when data are in memory
+            data = self.__data.get(attr)
+            if data is None:
+                if not self.__hasattr(attr):
+                    self.load(attrs=[attr])
+                data = self.get(attr)
+            return data[id]
         except Exception as e:
             self.logger.error(str(e))
 
@@ -232,10 +510,7 @@ class rrCache:
             self.logger.error(str(e))
 
     def set(self, attr: str, val: object):
-        try:
-            return setattr(self, '__'+attr, val)
-        except Exception as e:
-            self.logger.error(str(e))
+        self.__data[attr] = val
 
     #####################################################
     ################# ERROR functions ###################
@@ -267,9 +542,19 @@ class rrCache:
     def generate_cache(
         outdir: str = DEFAULTS['cache_dir'],
         mnx_version: str = DEFAULTS['mnx_version'],
-        logger: Logger = getLogger(__name__)
+        logger: Logger = getLogger(__name__),
+        attrs: List[str] = None
     ) -> None:
 
+        # Only generate 'attrs' (all attributes by default)
+        # and what they are generated from
+        required = rrCache._required(attrs)
+        required_files = {
+            filename
+            for attr in required
+            for filename in rrCache.__cache[attr]['deps']['file_deps']
+        }
+
         if outdir is DEFAULTS['cache_dir']:
             outdir = HERE
         input_cache_dir = os_path.join(
@@ -289,50 +574,136 @@ class rrCache:
 
         # FETCH INPUT_CACHE FILES
         print_start(logger, 'Downloading input cache')
+        # Files to fetch: (url, filename, fingerprint)
+        inputs = []
         for input_type, input in rrCache.__input__cache.items():
             # ignore MNX versions other that specified
             if input_type.startswith('mnx_') and \
             input_type != f'mnx_{mnx_version}':
                 pass
             else:
-                logger.debug(f'Downloading {input_type}...')
                 for filename, fingerprint in input['files'].items():
-                    rrCache._download_input_cache(
-                        url=input['url'],
-                        file=filename,
-                        outdir=input_cache_dir,
-                        fingerprint=fingerprint,
-                        logger=logger
+                    if filename in required_files:
+                        inputs.append((input['url'], filename, fingerprint))
+        # Do not download again files already on disk
+        computed_shas = rrCache._fingerprints(
+            [os_path.join(input_cache_dir, filename) for _, filename, _ in inputs],
+            logger
+        )
+        inputs = [
+            (url, filename, fingerprint)
+            for url, filename, fingerprint in inputs
+            if computed_shas.get(os_path.join(input_cache_dir, filename)) != fingerprint
+        ]
+        if inputs:
+            # Downloads are network-bound, fetch all input files concurrently
+            with ThreadPoolExecutor(
+                max_workers=min(len(inputs), DOWNLOAD_MAX_WORKERS)
+            ) as executor:
+                futures = []
+                for url, filename, fingerprint in inputs:
+                    logger.debug(f'Downloading {filename}...')
+                    futures.append(
+                        executor.submit(
+                            rrCache._download_input_cache,
+                            url=url,
+                            file=filename,
+                            outdir=input_cache_dir,
+                            fingerprint=fingerprint,
+                            logger=logger
+                        )
+                    )
+                # Propagate download errors to the caller
+                for (_, filename, _), future in zip(inputs, futures):
+                    # Fingerprint computed while downloading
+                    sha = future.result()
+                    rrCache._store_fingerprint(
+                        os_path.join(input_cache_dir, filename), sha, logger
                     )
 
         print_end(logger)
 
         # GENERATE CACHE FILES AND STORE THEM TO DISK
+        # Independent steps run in parallel, each one
+        # as soon as the steps it depends on are done
         print_start(logger, 'Generating cache')
-        deprecatedCID_cid = rrCache._gen_deprecatedCID_cid(input_cache_dir, cache_dir, logger)
-        print_progress(logger)
-        cid_strc, cid_name = rrCache._gen_cid_strc_cid_name(input_cache_dir, cache_dir, deprecatedCID_cid, logger)
-        print_progress(logger)
-        rrCache._gen_inchikey_cid(input_cache_dir, cache_dir, cid_strc, logger)
-        print_progress(logger)
-        del cid_strc, cid_name
-        cid_xref = rrCache._gen_cid_xref(input_cache_dir, cache_dir, deprecatedCID_cid, logger)
-        print_progress(logger)
-        rrCache._gen_chebi_cid(input_cache_dir, cache_dir, cid_xref)
-        print_progress(logger)
-        del cid_xref
-        deprecatedRID_rid = rrCache._gen_deprecatedRID_rid(input_cache_dir, cache_dir, logger)
-        print_progress(logger)
-        rrCache._gen_rr_reactions(input_cache_dir, cache_dir, logger)  # , deprecatedCID_cid, deprecatedRID_rid, logger)
-        print_progress(logger)
-        rrCache._gen_comp_xref_deprecatedCompID_compid(input_cache_dir, cache_dir, logger)
-        print_progress(logger)
-        rrCache._gen_template_reactions(input_cache_dir, cache_dir, deprecatedRID_rid, logger)  # , deprecatedCID_cid, deprecatedRID_rid, logger)
-        print_progress(logger)
-        del deprecatedCID_cid, deprecatedRID_rid
-        print_progress(logger)
+        # Steps to run: step name (first attribute it generates),
+        # method and steps whose result it reads
+        plan = {}
+        if 'deprecatedCID_cid' in required:
+            plan['deprecatedCID_cid'] = (rrCache._gen_deprecatedCID_cid, [])
+        if 'deprecatedRID_rid' in required:
+            plan['deprecatedRID_rid'] = (rrCache._gen_deprecatedRID_rid, [])
+        if 'rr_reactions' in required:
+            plan['rr_reactions'] = (rrCache._gen_rr_reactions, [])
+        if required.intersection(('comp_xref', 'deprecatedCompID_compid')):
+            plan['comp_xref'] = (rrCache._gen_comp_xref_deprecatedCompID_compid, [])
+        if 'template_reactions' in required:
+            plan['template_reactions'] = (rrCache._gen_template_reactions, ['deprecatedRID_rid'])
+        if required.intersection(('cid_strc', 'cid_name')):
+            plan['cid_strc'] = (rrCache._gen_cid_strc_cid_name, ['deprecatedCID_cid'])
+        if 'cid_xref' in required:
+            plan['cid_xref'] = (rrCache._gen_cid_xref, ['deprecatedCID_cid'])
+        if 'chebi_cid' in required:
+            plan['chebi_cid'] = (rrCache._gen_chebi_cid, ['cid_xref'])
+        if 'inchikey_cid' in required:
+            plan['inchikey_cid'] = (rrCache._gen_inchikey_cid, ['cid_strc'])
+        with ProcessPoolExecutor(max_workers=GENERATE_MAX_WORKERS) as executor:
+            # step: result
+            results = {}
+            # future: step
+            running = {}
+            while plan or running:
+                for step, (gen, deps) in list(plan.items()):
+                    if all(dep in results for dep in deps):
+                        del plan[step]
+                        running[executor.submit(
+                            rrCache._run_gen_step, gen,
+                            input_cache_dir, cache_dir,
+                            *[results[dep] for dep in deps],
+                            logger=logger
+                        )] = step
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    # Propagate errors to the caller
+                    results[step] = future.result()
+                    if step == 'cid_strc':
+                        # cid_strc and cid_name are generated together
+                        results[step] = results[step][0]
+                    print_progress(logger)
         print_end(logger)
 
+    ## Method to run a cache generation step in a worker process
+    #
+    # Generated data are not sent back to the parent process,
+    # steps which need them load them from the cache file
+    #
+    #  @param gen _gen_* method to run
+    #  @return what 'gen' returns, without data
+    @staticmethod
+    def _run_gen_step(gen, *args, **kwargs):
+        res = gen(*args, **kwargs)
+        if res is None:
+            return None
+        if isinstance(res, tuple):
+            return tuple({'attr': None, 'file': r['file']} for r in res)
+        return {'attr': None, 'file': res['file']}
+
+
+    @staticmethod
+    def _required(attrs: List[str] = None) -> Set[str]:
+        """Return 'attrs' and all attributes they are generated from."""
+        if attrs is None:
+            attrs = rrCache.__attributes_list
+        required = set()
+        to_visit = list(attrs)
+        while to_visit:
+            attr = to_visit.pop()
+            if attr not in required:
+                required.add(attr)
+                to_visit.extend(rrCache.__cache[attr]['deps']['attr_deps'])
+        return required
 
     @staticmethod
     def _gen_deprecatedCID_cid(
@@ -343,22 +714,19 @@ class rrCache:
         attribute = 'deprecatedCID_cid'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         deprecatedCID_cid = None
-        f_deprecatedCID_cid = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_deprecatedCID_cid = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [os_path.join(input_dir, 'chem_xref.tsv')]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_deprecatedCID_cid) and check_sha(
-            f_deprecatedCID_cid,
-            rrCache.__cache[attribute]
-        ):
-            deprecatedCID_cid = rrCache._load_cache_from_file(f_deprecatedCID_cid)
+        if rrCache._is_generated(f_deprecatedCID_cid, attribute, inputs):
+            # Loaded by the steps which need it
             logger.debug("   Cache file already exists")
         else:
             logger.debug("   Generating data...")
-            deprecatedCID_cid = rrCache._m_deprecatedMNXM(
-                os_path.join(input_dir, 'chem_xref.tsv')
-            )
+            deprecatedCID_cid = rrCache._m_deprecatedMNXM(inputs[0])
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(deprecatedCID_cid, f_deprecatedCID_cid)
+            rrCache._store_inputs_signature(f_deprecatedCID_cid, inputs, logger)
 
         return {
             'attr': deprecatedCID_cid,
@@ -378,33 +746,38 @@ class rrCache:
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         cid_strc = None
         cid_name = None
-        f_cid_strc = os_path.join(outdir, rrCache.__cache['cid_strc']['file']['name'])
-        f_cid_name = os_path.join(outdir, rrCache.__cache['cid_name']['file']['name'])
+        f_cid_strc = os_path.join(outdir, rrCache.__cache_filenames['cid_strc'])
+        f_cid_name = os_path.join(outdir, rrCache.__cache_filenames['cid_name'])
+        inputs = [
+            os_path.join(input_dir, 'compounds.tsv.gz'),
+            os_path.join(input_dir, 'chem_prop.tsv'),
+            os_path.join(input_dir, 'MNXM_replacement_20190524.csv'),
+            deprecatedCID_cid['file']
+        ]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_cid_strc) and check_sha(
-            f_cid_strc,
-            rrCache.__cache['cid_strc']
-        ) and os_path.exists(f_cid_name) and check_sha(
-            f_cid_name,
-            rrCache.__cache['cid_name']
+        if rrCache._is_generated(
+            f_cid_strc, 'cid_strc', inputs
+        ) and rrCache._is_generated(
+            f_cid_name, 'cid_name', inputs
         ):
-            cid_strc = rrCache._load_cache_from_file(f_cid_strc)
+            # Loaded by the steps which need it
             logger.debug("   Cache file already exists")
         else:
             if not deprecatedCID_cid['attr']:
                 logger.debug("   Loading input data from file...")
-                deprecatedCID_cid = rrCache._load_cache_from_file(deprecatedCID_cid['file'])
+                deprecatedCID_cid['attr'] = rrCache._load_cache_from_file(deprecatedCID_cid['file'])
                 # print_OK()
             logger.debug("   Generating data...")
             cid_strc, cid_name = rrCache._m_mnxm_strc(
-                os_path.join(input_dir, 'compounds.tsv.gz'),
-                os_path.join(input_dir, 'chem_prop.tsv'),
-                deprecatedCID_cid['attr']
+                inputs[0],
+                inputs[1],
+                deprecatedCID_cid['attr'],
+                max_workers=DEPICTION_MAX_WORKERS
             )
             # Replace compound IDs that have no structure with one that has.
             # Done from a manually built file
-            with open(os_path.join(input_dir, 'MNXM_replacement_20190524.csv')) as csv_file:
+            with open(inputs[2]) as csv_file:
                 reader = csv_reader(csv_file, delimiter=' ')
                 for row in reader:
                     if not row[0].startswith('#') and len(row) > 1:
@@ -413,6 +786,8 @@ class rrCache:
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(cid_strc, f_cid_strc)
             rrCache._store_cache_to_file(cid_name, f_cid_name)
+            rrCache._store_inputs_signature(f_cid_strc, inputs, logger)
+            rrCache._store_inputs_signature(f_cid_name, inputs, logger)
 
         return {
             'attr': cid_strc,
@@ -432,13 +807,11 @@ class rrCache:
         attribute = 'inchikey_cid'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         inchikey_cid = None
-        f_inchikey_cid = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_inchikey_cid = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [cid_strc['file']]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_inchikey_cid) and check_sha(
-            f_inchikey_cid,
-            rrCache.__cache[attribute]
-        ):
+        if rrCache._is_generated(f_inchikey_cid, attribute, inputs):
             logger.debug("   Cache file already exists")
         else:
             if not cid_strc['attr']:
@@ -448,6 +821,7 @@ class rrCache:
             inchikey_cid = rrCache._m_inchikey_cid(cid_strc['attr'])
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(inchikey_cid, f_inchikey_cid)
+            rrCache._store_inputs_signature(f_inchikey_cid, inputs, logger)
             del inchikey_cid
 
 
@@ -461,14 +835,15 @@ class rrCache:
         attribute = 'cid_xref'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         cid_xref = None
-        f_cid_xref = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_cid_xref = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [
+            os_path.join(input_dir, 'chem_xref.tsv'),
+            deprecatedCID_cid['file']
+        ]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_cid_xref) and check_sha(
-            f_cid_xref,
-            rrCache.__cache[attribute]
-        ):
-            cid_xref = rrCache._load_cache_from_file(f_cid_xref)
+        if rrCache._is_generated(f_cid_xref, attribute, inputs):
+            # Loaded by the steps which need it
             logger.debug("   Cache file already exists")
         else:
             if not deprecatedCID_cid['attr']:
@@ -476,11 +851,12 @@ class rrCache:
                 deprecatedCID_cid['attr'] = rrCache._load_cache_from_file(deprecatedCID_cid['file'])
             logger.debug("   Generating data...")
             cid_xref = rrCache._m_mnxm_xref(
-                os_path.join(input_dir, 'chem_xref.tsv'),
+                inputs[0],
                 deprecatedCID_cid['attr']
             )
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(cid_xref, f_cid_xref)
+            rrCache._store_inputs_signature(f_cid_xref, inputs, logger)
 
         return {
             'attr': cid_xref,
@@ -498,20 +874,22 @@ class rrCache:
         attribute = 'chebi_cid'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         chebi_cid = None
-        f_chebi_cid = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_chebi_cid = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [cid_xref['file']]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_chebi_cid) and check_sha(
-            f_chebi_cid,
-            rrCache.__cache[attribute]
-        ):
+        if rrCache._is_generated(f_chebi_cid, attribute, inputs):
             logger.debug("   Cache file already exists")
         else:
+            if not cid_xref['attr']:
+                logger.debug("   Loading input data from file...")
+                cid_xref['attr'] = rrCache._load_cache_from_file(cid_xref['file'])
             logger.debug("   Generating data...")
             chebi_cid = rrCache._m_chebi_cid(cid_xref['attr'])
             # print_OK()
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(chebi_cid, f_chebi_cid)
+            rrCache._store_inputs_signature(f_chebi_cid, inputs, logger)
             del chebi_cid
             # print_OK()
 
@@ -525,22 +903,19 @@ class rrCache:
         attribute = 'deprecatedRID_rid'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         deprecatedRID_rid = None
-        f_deprecatedRID_rid = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_deprecatedRID_rid = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [os_path.join(input_dir, 'reac_xref.tsv')]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_deprecatedRID_rid) and check_sha(
-            f_deprecatedRID_rid,
-            rrCache.__cache[attribute]
-        ):
-            deprecatedRID_rid = rrCache._load_cache_from_file(f_deprecatedRID_rid)
+        if rrCache._is_generated(f_deprecatedRID_rid, attribute, inputs):
+            # Loaded by the steps which need it
             logger.debug("   Cache file already exists")
         else:
             logger.debug("   Generating data...")
-            deprecatedRID_rid = rrCache._m_deprecatedMNXR(
-                os_path.join(input_dir, 'reac_xref.tsv')
-            )
+            deprecatedRID_rid = rrCache._m_deprecatedMNXR(inputs[0])
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(deprecatedRID_rid, f_deprecatedRID_rid)
+            rrCache._store_inputs_signature(f_deprecatedRID_rid, inputs, logger)
 
         return {
             'attr': deprecatedRID_rid,
@@ -559,13 +934,11 @@ class rrCache:
         attribute = 'rr_reactions'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         rr_reactions = None
-        f_rr_reactions = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_rr_reactions = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [os_path.join(input_dir, 'retrorules_rr02_flat_all.tsv.gz')]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_rr_reactions) and check_sha(
-            f_rr_reactions,
-            rrCache.__cache[attribute]
-        ):
+        if rrCache._is_generated(f_rr_reactions, attribute, inputs):
             logger.debug("   Cache file already exists")
         else:
             # if not deprecatedCID_cid['attr']:
@@ -577,7 +950,7 @@ class rrCache:
             #     print_OK()
             logger.debug("   Generating data...")
             rr_reactions = rrCache._m_rr_reactions(
-                os_path.join(input_dir, 'retrorules_rr02_flat_all.tsv.gz'),
+                inputs[0],
                 logger=logger
                 # deprecatedCID_cid,
                 # deprecatedRID_rid
@@ -585,6 +958,7 @@ class rrCache:
             # del deprecatedRID_rid
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(rr_reactions, f_rr_reactions)
+            rrCache._store_inputs_signature(f_rr_reactions, inputs, logger)
             del rr_reactions
 
 
@@ -597,31 +971,30 @@ class rrCache:
         attribute = 'comp_xref, deprecatedCompID_compid'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         comp_xref = deprecatedCompID_compid = None
-        f_comp_xref = os_path.join(outdir, rrCache.__cache['comp_xref']['file']['name'])
-        f_deprecatedCompID_compid = os_path.join(outdir, rrCache.__cache['deprecatedCompID_compid']['file']['name'])
+        f_comp_xref = os_path.join(outdir, rrCache.__cache_filenames['comp_xref'])
+        f_deprecatedCompID_compid = os_path.join(outdir, rrCache.__cache_filenames['deprecatedCompID_compid'])
+        inputs = [os_path.join(input_dir, 'comp_xref.tsv')]
 
         # Do not checksum since it is a dictionary
-        if os_path.exists(f_comp_xref) and check_sha(
-            f_comp_xref,
-            rrCache.__cache['comp_xref']
-        ) and os_path.exists(f_deprecatedCompID_compid) and check_sha(
-            f_deprecatedCompID_compid,
-            rrCache.__cache['deprecatedCompID_compid']
+        if rrCache._is_generated(
+            f_comp_xref, 'comp_xref', inputs
+        ) and rrCache._is_generated(
+            f_deprecatedCompID_compid, 'deprecatedCompID_compid', inputs
         ):
             logger.debug("   Cache files already exist")
             # print_OK()
         else:
             logger.debug("   Generating data...")
-            comp_xref, deprecatedCompID_compid = rrCache._m_mnxc_xref(
-                os_path.join(input_dir, 'comp_xref.tsv')
-            )
+            comp_xref, deprecatedCompID_compid = rrCache._m_mnxc_xref(inputs[0])
             # print_OK()
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(comp_xref, f_comp_xref)
+            rrCache._store_inputs_signature(f_comp_xref, inputs, logger)
             # print_OK()
             del comp_xref
             logger.debug("   Writing data to file...")
             rrCache._store_cache_to_file(deprecatedCompID_compid, f_deprecatedCompID_compid)
+            rrCache._store_inputs_signature(f_deprecatedCompID_compid, inputs, logger)
             # print_OK()
             del deprecatedCompID_compid
 
@@ -639,7 +1012,15 @@ class rrCache:
         attribute = 'template_reactions'
         logger.debug(c_attr('bold')+attribute+c_attr('reset'))
         template_reactions = None
-        f_template_reactions = os_path.join(outdir, rrCache.__cache[attribute]['file']['name'])
+        f_template_reactions = os_path.join(outdir, rrCache.__cache_filenames[attribute])
+        inputs = [
+            os_path.join(input_dir, 'rxn_recipes.tsv.gz'),
+            deprecatedRID_rid['file']
+        ]
+
+        if rrCache._is_generated(f_template_reactions, attribute, inputs):
+            logger.debug("   Cache file already exists")
+            return
 
         # if os_path.exists(f_template_reactions) and check_sha(
         #     f_template_reactions,
@@ -647,10 +1028,11 @@ class rrCache:
         # ):
         #     logger.debug("   Cache file already exists")
         # else:
+        if not deprecatedRID_rid['attr']:
+            logger.debug("   Loading input data from file...")
+            deprecatedRID_rid['attr'] = rrCache._load_cache_from_file(deprecatedRID_rid['file'])
         logger.debug("   Generating data...")
-        template_reactions = rrCache._m_template_reactions(
-            os_path.join(input_dir, 'rxn_recipes.tsv.gz')
-        )
+        template_reactions = rrCache._m_template_reactions(inputs[0])
         for depRID, newRID in deprecatedRID_rid['attr'].items():
             try:
                 template_reactions[depRID] = template_reactions[newRID]
@@ -658,6 +1040,7 @@ class rrCache:
                 logger.warning(f'Reaction ID {key} not found in rxn_recipes.tsv.gz')
         logger.debug("   Writing data to file...")
         rrCache._store_cache_to_file(template_reactions, f_template_reactions)
+        rrCache._store_inputs_signature(f_template_reactions, inputs, logger)
         del template_reactions
 
 
@@ -674,20 +1057,12 @@ class rrCache:
 
 
     def _check_or_load_cache_in_memory(self):
-        print_start(self.logger, 'Loading cache in memory')
+        # Cache files are loaded in memory on first access (see get())
         for attribute in self.__attributes_list:
-            filename = rrCache.__cache[attribute]['file']['name']
-            if self.get(attribute) is None:
-                self.set(
-                    attribute,
-                    self._load_cache_from_file(
-                        os_path.join(self.__cache_dir, filename)
-                    )
-                )
-                print_progress(self.logger)
+            if self.__data.get(attribute) is None:
+                self.logger.debug(attribute+" will be loaded on first access")
             else:
                 self.logger.debug(attribute+" already loaded in memory")
-        print_end(self.logger)
 
 
     @staticmethod
@@ -701,29 +1076,24 @@ class rrCache:
         if not os_path.isdir(outdir):
             makedirs(outdir, exist_ok=True)
         filename = os_path.join(outdir, file)
-        if (
-            not os_path.isfile(filename)
-            or not check_sha(filename, fingerprint)
-        ):
-            # start_time = time_time()
-            rrCache.__download_input_cache(url, file, outdir)
-            print_progress(logger)
-            # end_time = time_time()
-        if not check_sha(
-            filename,
-            fingerprint
-        ):  # sha not ok
+        # start_time = time_time()
+        try:
+            # The file is not replaced if its fingerprint is not the expected one
+            computed = rrCache.__download_input_cache(url, file, outdir, fingerprint)
+        except FileCorruptedError as e:  # sha not ok
             logger.debug(f'\n\
                 filename: {filename}\n\
-                sha (computed): {sha512(Path(filename).read_bytes()).hexdigest()}\n\
-                sha (expected): {fingerprint}\n\
+                {e}\n\
             '
             )
             logger.error(f'\nUnable to download input-cache file {file}.')
             logger.error('\nEither the URL is broken or the file content has changed.')
             logger.error('\nExiting...\n')
             exit()
-            raise FileCorruptedError
+            raise
+        print_progress(logger)
+        # end_time = time_time()
+        return computed
 
 
     @staticmethod
@@ -731,6 +1101,7 @@ class rrCache:
         url: str,
         file: str,
         outdir: str,
+        fingerprint: str = None,
         logger: Logger = getLogger(__name__)
     ):
 
@@ -738,7 +1109,54 @@ class rrCache:
             makedirs(outdir ,exist_ok=True)
 
         logger.debug(f'Downloading {file} from {url}')
-        download(url+file, os_path.join(outdir, file))
+        return rrCache._download(url+file, os_path.join(outdir, file), fingerprint)
+
+    ## Method to download a file and compute its fingerprint on the fly
+    #
+    #  The file is written to a temporary file first so that
+    #  a partially downloaded (or corrupted) file is never left behind
+    #
+    #  @param url URL to download from
+    #  @param filename File to write into
+    #  @param expected_sha Expected SHA-512 fingerprint (not checked if None)
+    #  @return SHA-512 fingerprint of the downloaded file
+    #  @raise FileCorruptedError if the fingerprint is not the expected one
+    @staticmethod
+    def _download(url: str, filename: str, expected_sha: str = None) -> str:
+        h = sha512()
+        with rrCache._http_session().get(url, stream=True) as r:
+            # Do not store (and fingerprint) an error page
+            r.raise_for_status()
+            with rrCache._atomic_write(filename) as fp:
+                for block in r.iter_content(HASH_CHUNK_SIZE):
+                    fp.write(block)
+                    h.update(block)
+                computed = h.hexdigest()
+                # Checked before the file is replaced
+                if expected_sha is not None and computed != expected_sha:
+                    raise FileCorruptedError(
+                        f'{url}: sha (computed): {computed}, '
+                        f'sha (expected): {expected_sha}'
+                    )
+        return computed
+
+    ## Method to get the HTTP session shared by all downloads
+    #
+    #  Connections to a same host are kept alive and reused
+    #  instead of being opened (TCP + TLS) for each file
+    #
+    #  @return HTTP session
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _http_session() -> Session:
+        adapter = HTTPAdapter(
+            pool_maxsize=DOWNLOAD_MAX_WORKERS,
+            max_retries=DOWNLOAD_MAX_RETRIES
+        )
+        session = Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     ##########################################################
     ################## Private Functions #####################
@@ -746,21 +1164,254 @@ class rrCache:
 
     ## Method to load data from file
     #
-    #  Load data from file
+    #  Load data from file. If 'fingerprint' is given, a binary (pickle)
+    #  copy of the data is kept next to the file and loaded instead, which
+    #  is much faster than parsing JSON again. The copy records the size,
+    #  modification time and SHA-512 of the file it was made from. It is
+    #  only loaded if the file still has them and its SHA-512 is the
+    #  expected one, and only plain data are unpickled from it.
     #
-    #  @param self Object pointer
     #  @param filename File to fetch data from
+    #  @param fingerprint Expected SHA-512 of 'filename' (no copy if None)
+    #  @param logger Logger
     #  @return file content
+    @staticmethod
+    def _load_cache_from_file(
+        filename: str,
+        fingerprint: str = None,
+        logger: Logger = getLogger(__name__)
+    ) -> Dict:
+        logger.debug(filename)
+        pickle_filename = filename+PICKLE_EXT
+        signature = None
+        if fingerprint is not None:
+            signature = rrCache._files_signature([filename])
+        if signature is not None:
+            # SHA-512 recorded when the file was verified (load())
+            sha = rrCache._fingerprints([filename], logger).get(filename)
+            if sha == fingerprint:
+                signature = signature[filename]+[sha]
+                try:
+                    with open(pickle_filename, 'rb') as fp:
+                        copy = rrCache._DataUnpickler(fp).load()
+                    if (
+                        isinstance(copy, tuple) and len(copy) == 2
+                        and copy[0] == signature
+                    ):
+                        return copy[1]
+                except (OSError, EOFError, UnpicklingError, ValueError) as e:
+                    logger.debug(f'Cannot load {pickle_filename}: {e}')
+            else:
+                signature = None
+        # Equal strings are shared in memory, which the pickle copy keeps
+        data = rrCache._share_strings(rrCache._load_json(filename))
+        if signature is not None:
+            rrCache._store_pickle(
+                (signature, data),
+                pickle_filename,
+                logger
+            )
+        return data
+
+    ## Unpickler of data only
+    #
+    #  Cache data are made of dicts, lists, strings and numbers, which are
+    #  unpickled without looking up any class or function. Refusing to look
+    #  them up makes it impossible for a pickle to run code when loaded.
+    class _DataUnpickler(Unpickler):
 
+        def find_class(self, module, name):
+            raise UnpicklingError(f'{module}.{name} is not data')
 
+    ## Method to make equal strings of data share the same object
+    #
+    #  JSON parsers create a new string object for each value, even
+    #  when values are repeated (formulas, SMILES, IDs...), and do not
+    #  share keys with values (IDs are both keys and values)
+    #
+    #  @param data Data to process (lists are modified in place)
+    #  @return data, with dicts rebuilt on shared keys
     @staticmethod
-    def _load_cache_from_file(filename, logger: Logger = getLogger(__name__)):
-        logger.debug(filename)
-        if filename.endswith('.gz') or filename.endswith('.zip'):
-            fp = gzip_open(filename, 'rt', encoding='ascii')
+    def _share_strings(data):
+        share = {}.setdefault
+
+        def _share(value):
+            if isinstance(value, str):
+                return share(value, value)
+            if isinstance(value, dict):
+                return {
+                    share(key, key): _share(val)
+                    for key, val in value.items()
+                }
+            if isinstance(value, list):
+                value[:] = map(_share, value)
+            return value
+
+        return _share(data)
+
+    ## Method to load data from a JSON file (gzipped or not)
+    #
+    #  @param filename File to fetch data from
+    #  @return file content
+    @staticmethod
+    def _load_json(filename: str) -> Dict:
+        compressed = filename.endswith('.gz') or filename.endswith('.zip')
+        if orjson_loads is not None:
+            # Parse raw bytes, without decoding them to str first
+            if compressed:
+                fp = rrCache._open_gz(filename, 'rb')
+            else:
+                fp = open(filename, 'rb')
+            with fp:
+                return orjson_loads(fp.read())
+        if compressed:
+            # orjson writes UTF-8
+            fp = rrCache._open_gz(filename, encoding='utf-8')
         else:
-            fp = open(filename, 'r')
-        return json_load(fp)
+            fp = open(filename, 'r', encoding='utf-8')
+        with fp:
+            return json_load(fp)
+
+    ## Method to open a file to be written atomically
+    #
+    #  Data is written to a uniquely named temporary file in the same
+    #  folder, which replaces the file once complete. A partial file is
+    #  thus never read, and concurrent writers do not mix their data.
+    #
+    #  @param filename File to write
+    #  @param mode Opening mode ('wb' or 'w')
+    #  @return file object (context manager)
+    @staticmethod
+    @contextmanager
+    def _atomic_write(filename: str, mode: str = 'wb'):
+        tmp_filename = os_path.join(
+            os_path.dirname(os_path.abspath(filename)),
+            f'{os_path.basename(filename)}.{token_hex(8)}.tmp'
+        )
+        # Created with the permissions of any new file (umask applied)
+        fd = os_open(tmp_filename, O_WRONLY | O_CREAT | O_EXCL, 0o666)
+        try:
+            with fdopen(fd, mode) as fp:
+                yield fp
+            replace(tmp_filename, filename)
+        except BaseException:
+            try:
+                remove(tmp_filename)
+            except OSError:
+                pass
+            raise
+
+    ## Method to store the binary copy of loaded data
+    #
+    #  Failing to write it is not an error, the data
+    #  will be loaded from the original file the next time.
+    #
+    #  @param data Data to write into file
+    #  @param filename File to write data into
+    @staticmethod
+    def _store_pickle(
+        data: Dict,
+        filename: str,
+        logger: Logger = getLogger(__name__)
+    ) -> None:
+        try:
+            with rrCache._atomic_write(filename) as fp:
+                pickle_dump(data, fp, protocol=PICKLE_PROTOCOL)
+        except OSError as e:
+            logger.debug(f'Cannot store {filename}: {e}')
+
+    ## Method to compute the signature of a set of files
+    #
+    # Size and modification time of each file are enough
+    # to tell that a file has been replaced
+    #
+    #  @param filenames Files to sign
+    #  @return signature (dict), None if a file is missing
+    @staticmethod
+    def _files_signature(filenames: List[str]) -> Dict:
+        signature = {}
+        for filename in filenames:
+            try:
+                st = os_stat(filename)
+            except OSError:
+                return None
+            signature[filename] = [st.st_size, st.st_mtime_ns]
+        return signature
+
+    ## Method to read a signature file
+    #
+    #  @param filename Signature file
+    #  @return signature (dict), None if not available
+    @staticmethod
+    def _load_signature(filename: str) -> Dict:
+        try:
+            with open(filename) as fp:
+                return json_load(fp)
+        except (OSError, ValueError):
+            return None
+
+    ## Method to write a signature file
+    #
+    #  Failing to write it is not an error,
+    #  signed files will be checked again the next time.
+    #
+    #  @param signature Signature to write
+    #  @param filename Signature file
+    #  @param logger Logger
+    @staticmethod
+    def _store_signature(
+        signature: Dict,
+        filename: str,
+        logger: Logger = getLogger(__name__)
+    ) -> None:
+        try:
+            with rrCache._atomic_write(filename, 'w') as fp:
+                json_dump(signature, fp)
+        except OSError as e:
+            logger.debug(f'Cannot store {filename}: {e}')
+
+    ## Method to store the signature of the inputs a cache file was generated from
+    #
+    # The generated file is signed as well so that
+    # a later (or partial) rewrite of it is detected
+    #
+    #  @param filename Generated cache file
+    #  @param inputs Input files 'filename' was generated from
+    #  @param logger Logger
+    @staticmethod
+    def _store_inputs_signature(
+        filename: str,
+        inputs: List[str],
+        logger: Logger = getLogger(__name__)
+    ) -> None:
+        signature = rrCache._files_signature(list(inputs)+[filename])
+        if signature is not None:
+            rrCache._store_signature(
+                signature,
+                filename+INPUTS_SIGNATURE_EXT,
+                logger
+            )
+
+    ## Method to open a gzipped file for reading
+    #
+    # Decompress with rapidgzip on all cores if available,
+    # else with ISA-L (python-isal) in a background thread,
+    # fall back to the gzip module otherwise
+    #
+    #  @param filename File to open
+    #  @param mode 'rt' (text) or 'rb' (binary)
+    #  @param encoding Text encoding (locale one by default)
+    #  @return file object
+    @staticmethod
+    def _open_gz(filename: str, mode: str = 'rt', encoding: str = None):
+        if rapidgzip_open is not None:
+            fp = rapidgzip_open(filename, parallelization=cpu_count())
+            if mode == 'rb':
+                return fp
+            return TextIOWrapper(fp, encoding=encoding)
+        if igzip_threaded_open is not None:
+            return igzip_threaded_open(filename, mode, encoding=encoding)
+        return gzip_open(filename, mode, encoding=encoding)
 
     ## Method to store data into file
     #
@@ -770,12 +1421,40 @@ class rrCache:
     #  @param data Data to write into file
     #  @param filename File to write data into
     @staticmethod
-    def _store_cache_to_file(data, filename):
-        if filename.endswith('.gz') or filename.endswith('.zip'):
-            fp = gzip_open(filename, 'wt', encoding='ascii')
-        else:
-            fp = open(filename, 'w')
-        json_dump(data, fp)
+    def _store_cache_to_file(
+        data: Dict,
+        filename: str
+    ) -> None:
+        compressed = filename.endswith('.gz') or filename.endswith('.zip')
+        # A partial cache file is never loaded
+        with rrCache._atomic_write(filename) as f:
+            fp = f
+            if compressed:
+                # Name the cache file, not the temporary one, in the header,
+                # and no timestamp: a same cache is written into a same file
+                fp = (igzip_GzipFile or GzipFile)(
+                    filename, 'wb', CACHE_COMPRESS_LEVEL, f, mtime=0
+                )
+            if orjson_dumps is None:
+                fp = TextIOWrapper(fp, encoding='ascii')
+            with fp:
+                if orjson_dumps is None:
+                    json_dump(data, fp)
+                else:
+                    fp.write(orjson_dumps(data, option=OPT_NON_STR_KEYS))
+
+    ## Method to parse rows of a TSV file
+    #
+    # Comment lines are skipped before being parsed
+    #
+    #  @param f Text file object to read from
+    #  @return iterator over rows
+    @staticmethod
+    def _read_tsv(f):
+        return csv_reader(
+            (line for line in f if not line.startswith('#')),
+            delimiter='\t'
+        )
 
     ## Function to create a dictionnary of old to new chemical id's
     #
@@ -784,9 +1463,12 @@ class rrCache:
     # TODO: check other things about the mnxm emtry like if it has the right structure etc...
     @staticmethod
     def _checkCIDdeprecated(cid, deprecatedCID_cid):
+        if not deprecatedCID_cid:
+            return cid
         try:
-            return deprecatedCID_cid[cid]
-        except (KeyError, TypeError):
+            return deprecatedCID_cid.get(cid, cid)
+        # Unhashable (malformed) ID
+        except TypeError:
             return cid
 
     ## Function to create a dictionnary of old to new reaction id's
@@ -794,9 +1476,12 @@ class rrCache:
     # TODO: check other things about the mnxm emtry like if it has the right structure etc...
     @staticmethod
     def _checkRIDdeprecated(rid, deprecatedRID_rid):
+        if not deprecatedRID_rid:
+            return rid
         try:
-            return deprecatedRID_rid[rid]
-        except (KeyError, TypeError):
+            return deprecatedRID_rid.get(rid, rid)
+        # Unhashable (malformed) ID
+        except TypeError:
             return rid
 
     #################################################################
@@ -818,15 +1503,17 @@ class rrCache:
 
     @staticmethod
     def _deprecatedMNX(xref_path):
-        deprecatedMNX_mnx = {}
         with open(xref_path, 'rt') as f:
-            c = csv_reader(f, delimiter='\t')
-            for row in c:
-                if not row[0][0] == '#':
-                    mnx = row[0].split(':')
-                    if mnx[0] == 'deprecated':
-                        deprecatedMNX_mnx[mnx[1]] = row[1]
-        return deprecatedMNX_mnx
+            # Only deprecated IDs are of interest,
+            # skip other lines before parsing them
+            return {
+                # 'deprecated:<old ID>[:...]' -> <old ID>
+                row[0].partition(':')[2].partition(':')[0]: row[1]
+                for row in csv_reader(
+                    (line for line in f if line.startswith('deprecated:')),
+                    delimiter='\t'
+                )
+            }
 
     ## Status function that parses the chem_xref.tsv file for chemical cross-references and the different
     #
@@ -834,7 +1521,6 @@ class rrCache:
     # @return Dictionnary of chemical id to other chemical ids ex: deprecatedCID_cid['MNXM1'] = {'mnx': ['MNXM01', ...], ...}
     @staticmethod
     def _m_deprecatedMNXM(chem_xref_path):
-        deprecatedCID_cid = {}
         deprecatedCID_cid = rrCache._deprecatedMNX(chem_xref_path)
         deprecatedCID_cid.update(rrCache.__convertMNXM)
         deprecatedCID_cid['MNXM01'] = 'MNXM1'
@@ -861,49 +1547,114 @@ class rrCache:
     #  @param rr_compounds_path Path to the RetroRules file
     #  @param chem_prop_path Path to the chem_prop.tsv file
     #  @param deprecatedCID_cid Dictionnary of deprecated CID to cid
+    #  @param max_workers Max number of processes converting depictions (all cores by default)
     #  @return cid_strc Dictionnary of formula, smiles, inchi and inchikey
     @staticmethod
     def _m_mnxm_strc(
         rr_compounds_path: str,
         chem_prop_path: str,
         deprecatedCID_cid: Dict,
+        max_workers: int = None,
         logger: Logger = getLogger(__name__)
     ) -> Tuple[Dict, Dict]:
 
         cid_strc = {}
         cid_name = {}
-
-        for row in csv_DictReader(gzip_open(rr_compounds_path, 'rt'), delimiter='\t'):
+        # Inlined _checkCIDdeprecated()
+        deprecatedCID_get = (deprecatedCID_cid or {}).get
+
+        with rrCache._open_gz(rr_compounds_path) as f:
+            rows = csv_reader(f, delimiter='\t')
+            # Column indices, cheaper than a dict per row (csv.DictReader)
+            header = next(rows)
+            i_cid = header.index('cid')
+            i_inchi = header.index('inchi')
+            compounds = [
+                (row[i_cid], row[i_inchi])
+                for row in rows
+                if row
+            ]
+        # RDKit conversions are CPU-bound, run them on all cores
+        resConvs = rrCache._convert_depictions(
+            [inchi for _, inchi in compounds],
+            itype='inchi',
+            otype={'smiles', 'inchikey'},
+            max_workers=max_workers
+        )
+        for cid, inchi in compounds:
             tmp = {
                 'formula':  None,
                 'smiles':   None,
-                'inchi':    row['inchi'],
+                'inchi':    inchi,
                 'inchikey': None,
-                'cid':      rrCache._checkCIDdeprecated(row['cid'], deprecatedCID_cid),
+                'cid':      deprecatedCID_get(cid, cid),
                 'name':     None
             }
-            try:
-                resConv = rrCache._convert_depiction(idepic=tmp['inchi'], itype='inchi', otype={'smiles', 'inchikey'})
+            resConv = resConvs[inchi]
+            if isinstance(resConv, rrCache.DepictionError):
+                logger.warning('Could not convert some of the structures: '+str(tmp))
+                logger.warning(resConv)
+            else:
                 for i in resConv:
                     tmp[i] = resConv[i]
-            except rrCache.DepictionError as e:
-                logger.warning('Could not convert some of the structures: '+str(tmp))
-                logger.warning(e)
             cid_strc[tmp['cid']] = tmp
+        del compounds, resConvs
+
+        # Structures of compounds not from RetroRules to complete,
+        # gathered first to be converted on all cores at once
+        to_convert = defaultdict(list)
+        with open(chem_prop_path, 'rt') as f:
+            for row in csv_reader(f, delimiter='\t'):
+                if not row:
+                    continue
+                if row[0].startswith('#'):
+                    fields = [field.replace('#', '').lower() for field in row]
+                elif len(row) < len(fields):
+                    # Truncated row, skipped by the loop below as well
+                    continue
+                elif deprecatedCID_get(row[0], row[0]) not in cid_strc:
+                    props = {
+                        field: None if value == '' or value == 'NA' else value
+                        for field, value in zip(fields, row)
+                    }
+                    itype, otype = rrCache._depiction_types(props)
+                    # Nothing to convert if there is nothing to generate
+                    if itype and otype:
+                        to_convert[(itype, frozenset(otype))].append(props[itype])
+        resConvs = {
+            (itype, otype): rrCache._convert_depictions(
+                idepics,
+                itype=itype,
+                otype=set(otype),
+                max_workers=max_workers
+            )
+            for (itype, otype), idepics in to_convert.items()
+        }
+        del to_convert
 
         with open(chem_prop_path, 'rt') as f:
             # read CSV with both tab and space as delimiters
             c = csv_reader(f, delimiter='\t')
             for row in c:
+                if not row:
+                    continue
                 if row[0].startswith('#'):
-                    header = row
+                    # remove '#' from column fields and
+                    # convert to lower case
+                    fields = [field.replace('#', '').lower() for field in row]
+                    # keys of tmp that are not filled from the row
+                    others = [key for key in tmp if key not in fields]
+                elif len(row) < len(fields):
+                    # Missing fields would keep the values of the previous row
+                    rrCache._warning(logger, 'Truncated row skipped: '+str(row))
                 else:
-                    for i in range(len(header)):
-                        # remove '#' from column field and
-                        # convert to lower case
-                        field = header[i].replace('#', '').lower()
-                        tmp[field] = row[i]
-                    mnxm = rrCache._checkCIDdeprecated(row[0], deprecatedCID_cid)
+                    # fill tmp and normalize empty values in a single pass
+                    for field, value in zip(fields, row):
+                        tmp[field] = None if value == '' or value == 'NA' else value
+                    for key in others:
+                        if tmp[key] == '' or tmp[key] == 'NA':
+                            tmp[key] = None
+                    mnxm = deprecatedCID_get(row[0], row[0])
                     # tmp = {
                     #     'formula':  row[2],
                     #     'smiles': row[6],
@@ -912,51 +1663,34 @@ class rrCache:
                     #     'cid': mnxm,
                     #     'name': row[1]
                     # }
-                    for i in tmp:
-                        if tmp[i] == '' or tmp[i] == 'NA':
-                            tmp[i] = None
                     if mnxm not in cid_name and tmp['name']:
                         cid_name[mnxm] = tmp['name']
-                    if mnxm in cid_strc:
-                        cid_strc[mnxm]['formula'] = row[2]
-                        cid_strc[mnxm]['name'] = row[1]
-                        if not cid_strc[mnxm]['smiles'] and tmp['smiles']:
-                            cid_strc[mnxm]['smiles'] = tmp['smiles']
-                        if not cid_strc[mnxm]['inchikey'] and tmp['inchikey']:
-                            cid_strc[mnxm]['inchikey'] = tmp['inchikey']
+                    # Merge into the RetroRules compound, if any
+                    strc = cid_strc.get(mnxm)
+                    if strc is not None:
+                        strc['formula'] = row[2]
+                        strc['name'] = row[1]
+                        if not strc['smiles'] and tmp['smiles']:
+                            strc['smiles'] = tmp['smiles']
+                        if not strc['inchikey'] and tmp['inchikey']:
+                            strc['inchikey'] = tmp['inchikey']
                     else:
-                        # check to see if the inchikey is valid or not
-                        otype = set({})
-                        if not tmp['inchikey']:
-                            otype.add('inchikey')
-                        if not tmp['smiles']:
-                            otype.add('smiles')
-                        if not tmp['inchi']:
-                            otype.add('inchi')
-                        itype = ''
-                        # Check if the current compound has
-                        # InChI or SMILES description
-                        if tmp['inchi']:
-                            itype = 'inchi'
-                        elif tmp['smiles']:
-                            itype = 'smiles'
-                        else:
-                            ter = StreamHandler.terminator
-                            StreamHandler.terminator = "\n"
-                            logger.warning('No InChI or SMILES for '+str(tmp))
-                            StreamHandler.terminator = ter
+                        itype, otype = rrCache._depiction_types(tmp)
+                        if not itype:
+                            rrCache._warning(logger, 'No InChI or SMILES for '+str(tmp))
                             continue
-                        ter = StreamHandler.terminator
-                        StreamHandler.terminator = "\n"
-                        try:
-                            resConv = rrCache._convert_depiction(idepic=tmp[itype], itype=itype, otype=otype)
+                        if otype:
+                            resConv = resConvs[(itype, frozenset(otype))][tmp[itype]]
+                        else:
+                            # Nothing to generate, do not import the depiction at all
+                            resConv = {}
+                        if isinstance(resConv, rrCache.DepictionError):
+                            rrCache._warning(logger, 'Structure conversion FAILED: '+str(tmp))
+                            rrCache._warning(logger, str(resConv))
+                        else:
                             for i in resConv:
                                 tmp[i] = resConv[i]
                             logger.debug('Sructure conversion OK: '+str(tmp))
-                        except rrCache.DepictionError as e:
-                            logger.warning('Structure conversion FAILED: '+str(tmp))
-                            logger.warning(e)
-                        # StreamHandler.terminator = ter
                         cid_strc[tmp['cid']] = tmp
         # logger.removeHandler(logger.handlers[-1])
 
@@ -979,32 +1713,40 @@ class rrCache:
         deprecatedCID_cid: Dict,
         logger: Logger = getLogger(__name__)
     ) -> Dict:
-        cid_xref = {}
+        # mnx: {dbName: {dbId: None}} (dicts used as insertion-ordered sets)
+        mnx_xref = defaultdict(lambda: defaultdict(dict))
+        # dbName: {dbId: mnx}
+        db_mnx = defaultdict(dict)
+        # Inlined _checkCIDdeprecated()
+        deprecatedCID_get = (deprecatedCID_cid or {}).get
         with open(chem_xref_path, 'rt') as f:
-            c = csv_reader(f, delimiter='\t')
-            for row in c:
-                if not row[0][0] == '#':
-                    mnx = rrCache._checkCIDdeprecated(row[1], deprecatedCID_cid)
-                    if len(row[0].split(':')) == 1:
+            for row in rrCache._read_tsv(f):
+                xref = row[0]
+                # IDs recur across rows, intern them to share a single string
+                mnx = intern(deprecatedCID_get(row[1], row[1]))
+                dbName, sep, dbId = xref.partition(':')
+                if not sep:
+                    dbName = 'mnx'
+                    dbId = xref
+                else:
+                    # IDs are stored without any ':'
+                    dbId = dbId.replace(':', '')
+                    if dbName == 'deprecated':
                         dbName = 'mnx'
-                        dbId = row[0]
-                    else:
-                        dbName = row[0].split(':')[0]
-                        dbId = ''.join(row[0].split(':')[1:])
-                        if dbName == 'deprecated':
-                            dbName = 'mnx'
-                    # mnx
-                    if mnx not in cid_xref:
-                        cid_xref[mnx] = {}
-                    if dbName not in cid_xref[mnx]:
-                        cid_xref[mnx][dbName] = []
-                    if dbId not in cid_xref[mnx][dbName]:
-                        cid_xref[mnx][dbName].append(dbId)
-                    ### DB ###
-                    if dbName not in cid_xref:
-                        cid_xref[dbName] = {}
-                    if dbId not in cid_xref[dbName]:
-                        cid_xref[dbName][dbId] = mnx
+                dbName = intern(dbName)
+                dbId = intern(dbId)
+                # mnx
+                mnx_xref[mnx][dbName][dbId] = None
+                ### DB ###
+                db_mnx[dbName].setdefault(dbId, mnx)
+        cid_xref = {
+            mnx: {
+                dbName: list(dbIds)
+                for dbName, dbIds in xrefs.items()
+            }
+            for mnx, xrefs in mnx_xref.items()
+        }
+        cid_xref.update(db_mnx)
         return cid_xref
 
 
@@ -1022,7 +1764,8 @@ class rrCache:
         comp_xref_path,
         logger: Logger = getLogger(__name__)
     ) -> Tuple[Dict, Dict]:
-        comp_xref = {}
+        # mnxc: {dbName: {dbCompId: None}} (dicts used as insertion-ordered sets)
+        mnxc_xref = defaultdict(lambda: defaultdict(dict))
         deprecatedCompID_compid = {}
 
         if not os_path.exists(comp_xref_path):
@@ -1030,33 +1773,34 @@ class rrCache:
             return None
 
         with open(comp_xref_path, 'rt') as f:
-            c = csv_reader(f, delimiter='\t')
-            # not_recognised = []
-            for row in c:
-                # cid = row[0].split(':')
-                if not row[0][0] == '#':
-                    # collect the info
-                    mnxc = row[1]
-                    if len(row[0].split(':')) == 1:
-                        dbName = 'mnx'
-                        dbCompId = row[0]
-                    else:
-                        dbName = row[0].split(':')[0]
-                        dbCompId = ''.join(row[0].split(':')[1:])
-                        dbCompId = dbCompId.lower()
-                    if dbName == 'deprecated':
-                        dbName = 'mnx'
-                    # create the dicts
-                    if mnxc not in comp_xref:
-                        comp_xref[mnxc] = {}
-                    if dbName not in comp_xref[mnxc]:
-                        comp_xref[mnxc][dbName] = []
-                    if dbCompId not in comp_xref[mnxc][dbName]:
-                        comp_xref[mnxc][dbName].append(dbCompId)
-                    # create the reverse dict
-                    if dbCompId not in deprecatedCompID_compid:
-                        deprecatedCompID_compid[dbCompId] = mnxc
-
+            for row in rrCache._read_tsv(f):
+                xref = row[0]
+                # collect the info
+                # IDs recur across rows, intern them to share a single string
+                mnxc = intern(row[1])
+                dbName, sep, dbCompId = xref.partition(':')
+                if not sep:
+                    dbName = 'mnx'
+                    dbCompId = xref
+                else:
+                    # IDs are stored without any ':'
+                    dbCompId = dbCompId.replace(':', '').lower()
+                if dbName == 'deprecated':
+                    dbName = 'mnx'
+                dbName = intern(dbName)
+                dbCompId = intern(dbCompId)
+                # create the dicts
+                mnxc_xref[mnxc][dbName][dbCompId] = None
+                # create the reverse dict
+                deprecatedCompID_compid.setdefault(dbCompId, mnxc)
+
+        comp_xref = {
+            mnxc: {
+                dbName: list(dbCompIds)
+                for dbName, dbCompIds in xrefs.items()
+            }
+            for mnxc, xrefs in mnxc_xref.items()
+        }
         return comp_xref, deprecatedCompID_compid
 
 
@@ -1087,44 +1831,60 @@ class rrCache:
             logger.error('Could not read the rules_rall file ('+str(rules_rall_path)+')')
             return None
 
-        for row in csv_DictReader(gzip_open(rules_rall_path, 'rt'), delimiter='\t'):
-            # NOTE: as of now all the rules are generated using MNX
-            # but it may be that other db are used, we are handling this case
-            # WARNING: can have multiple products so need to seperate them
-            products = {}
-
-            for cid in row['Product_IDs'].split('.'):
-
+        with rrCache._open_gz(rules_rall_path) as f:
+            rows = csv_reader(f, delimiter='\t')
+            # Column indices, cheaper than a dict per row (csv.DictReader)
+            header = next(rows)
+            i_rule_id = header.index('# Rule_ID')
+            i_reac_id = header.index('Reaction_ID')
+            i_subs_id = header.index('Substrate_ID')
+            i_products = header.index('Product_IDs')
+            i_score = header.index('Score_normalized')
+            i_direction = header.index('Rule_relative_direction')
+            for row in rows:
+                if not row:
+                    continue
+                # IDs recur across rows, intern them to share a single string
+                rule_id = intern(row[i_rule_id])
+                reac_id = intern(row[i_reac_id])
+                subs_id = intern(row[i_subs_id])
+                # NOTE: as of now all the rules are generated using MNX
+                # but it may be that other db are used, we are handling this case
+                # WARNING: can have multiple products so need to seperate them
                 # cid = rrCache._checkCIDdeprecated(i, deprecatedCID_cid)
-                if cid not in products:
-                    products[cid] = 1
+                products_ids = row[i_products].split('.')
+                # Most rules have a single product, do not count it
+                if len(products_ids) == 1:
+                    products = {intern(products_ids[0]): 1}
                 else:
-                    products[cid] += 1
+                    products = {}
+                    for cid in map(intern, products_ids):
+                        products[cid] = products.get(cid, 0) + 1
 
-            try:
-                # WARNING: one reaction rule can have multiple reactions associated with them
-                # To change when you can set subpaths from the mutliple numbers of
-                # we assume that the reaction rule has multiple unique reactions associated
-                if row['# Rule_ID'] not in rr_reactions:
-                    rr_reactions[row['# Rule_ID']] = {}
-                if row['# Rule_ID'] in rr_reactions[row['# Rule_ID']]:
-                    logger.warning('There is already reaction '+str(row['# Rule_ID'])+' in reaction rule '+str(row['# Rule_ID']))
-                rr_reactions[row['# Rule_ID']][row['Reaction_ID']] = {
-                    'rule_id': row['# Rule_ID'],
-                    'rule_score': float(row['Score_normalized']),
-                    # 'reac_id': rrCache._checkRIDdeprecated(row['Reaction_ID'], deprecatedRID_rid),
-                    # 'subs_id': rrCache._checkCIDdeprecated(row['Substrate_ID'], deprecatedCID_cid),
-                    'reac_id': row['Reaction_ID'],
-                    'subs_id': row['Substrate_ID'],
-                    'rel_direction': int(row['Rule_relative_direction']),
-                    # 'left': {rrCache._checkCIDdeprecated(row['Substrate_ID'], deprecatedCID_cid): 1},
-                    'left': {row['Substrate_ID']: 1},
-                    'right': products
-                }
-
-            except ValueError:
-                logger.error('Problem converting rel_direction: '+str(row['Rule_relative_direction']))
-                logger.error('Problem converting rule_score: '+str(row['Score_normalized']))
+                try:
+                    # WARNING: one reaction rule can have multiple reactions associated with them
+                    # To change when you can set subpaths from the mutliple numbers of
+                    # we assume that the reaction rule has multiple unique reactions associated
+                    if rule_id not in rr_reactions:
+                        rr_reactions[rule_id] = {}
+                    if rule_id in rr_reactions[rule_id]:
+                        logger.warning('There is already reaction '+str(rule_id)+' in reaction rule '+str(rule_id))
+                    rr_reactions[rule_id][reac_id] = {
+                        'rule_id': rule_id,
+                        'rule_score': float(row[i_score]),
+                        # 'reac_id': rrCache._checkRIDdeprecated(reac_id, deprecatedRID_rid),
+                        # 'subs_id': rrCache._checkCIDdeprecated(subs_id, deprecatedCID_cid),
+                        'reac_id': reac_id,
+                        'subs_id': subs_id,
+                        'rel_direction': int(row[i_direction]),
+                        # 'left': {rrCache._checkCIDdeprecated(subs_id, deprecatedCID_cid): 1},
+                        'left': {subs_id: 1},
+                        'right': products
+                    }
+
+                except ValueError:
+                    logger.error('Problem converting rel_direction: '+str(row[i_direction]))
+                    logger.error('Problem converting rule_score: '+str(row[i_score]))
 
         return rr_reactions
 
@@ -1152,34 +1912,45 @@ class rrCache:
 
         reactions = {}
 
-        for row in csv_DictReader(gzip_open(rxn_recipes_path, 'rt'), delimiter='\t'):
-
-            # Read equation
-            rxn = rrCache._read_equation(
-                row['Equation'],
-                row['#Reaction_ID'],
-                logger
-            )
-            if rxn is None:
-                # Pass to the next equation
-                continue
-
-            # Direction
-            dir = rrCache._read_direction(
-                row['Direction'],
-                logger
-            )
-            if dir is None:
-                # Pass to the next equation
-                continue
-            else:
-                rxn['direction'] = dir
+        with rrCache._open_gz(rxn_recipes_path) as f:
+            rows = csv_reader(f, delimiter='\t')
+            # Column indices, cheaper than a dict per row (csv.DictReader)
+            header = next(rows)
+            i_rxn_id = header.index('#Reaction_ID')
+            i_equation = header.index('Equation')
+            i_direction = header.index('Direction')
+            i_main_left = header.index('Main_left')
+            i_main_right = header.index('Main_right')
+            for row in rows:
+                if not row:
+                    continue
+
+                # Read equation
+                rxn = rrCache._read_equation(
+                    row[i_equation],
+                    row[i_rxn_id],
+                    logger
+                )
+                if rxn is None:
+                    # Pass to the next equation
+                    continue
+
+                # Direction
+                dir = rrCache._read_direction(
+                    row[i_direction],
+                    logger
+                )
+                if dir is None:
+                    # Pass to the next equation
+                    continue
+                else:
+                    rxn['direction'] = dir
 
-            # Others
-            rxn['main_left'] = row['Main_left'].split(',')
-            rxn['main_right'] = row['Main_right'].split(',')
+                # Others
+                rxn['main_left'] = list(map(intern, row[i_main_left].split(',')))
+                rxn['main_right'] = list(map(intern, row[i_main_right].split(',')))
 
-            reactions[row['#Reaction_ID']] = rxn
+                reactions[row[i_rxn_id]] = rxn
 
         return reactions
 
@@ -1191,14 +1962,12 @@ class rrCache:
         try:
             _dir = int(dir)
         except ValueError:
-            ter = StreamHandler.terminator
-            StreamHandler.terminator = "\n"
-            logger.warning(
+            rrCache._warning(
+                logger,
                 'Cannot convert direction value {dir} to int'.format(
                     dir=dir
                 )
             )
-            StreamHandler.terminator = ter
             # Pass to the next equation
             return None
         return _dir
@@ -1210,46 +1979,37 @@ class rrCache:
         logger: Logger = getLogger(__name__)
     ) -> Dict:
 
-        if not len(eq.split('=')) == 2:
+        sides = eq.split('=')
+        if not len(sides) == 2:
             logger.warning('There should never be more or less than a left and right of an equation')
             logger.warning('Ignoring {eq}'.format(eq=eq))
             return None
 
-        #### for character matching that are returned
-        DEFAULT_STOICHIO_RESCUE = {
-            '4n': 4, '3n': 3, '2n': 2, 'n': 1,
-            '(n)': 1, '(N)': 1, '(2n)': 2, '(x)': 1,
-            'N': 1, 'm': 1, 'q': 1,
-            '0.01': 1, '0.1': 1, '0.5': 1, '1.5': 1,
-            '0.02': 1, '0.2': 1,
-            '(n-1)': 0, '(n-2)': -1
-        }
-
         rxn = {}
 
-        # Use int indices to be directly usable by re_findall
         # 0 = left, 1 = right
         for side in [0, 1]:
             rxn[side] = {}
-            for spe in re_findall(r'(\(n-1\)|\d+|4n|3n|2n|n|\(n\)|\(N\)|\(2n\)|\(x\)|N|m|q|\(n\-2\)|\d+\.\d+) ([\w\d]+)@\w+', eq.split('=')[side]):
+            for match in EQUATION_SPECIES_PATTERN.finditer(sides[side]):
+                coeff, spe = match.group(1), match.group(2)
                 # 1) try to rescue if its one of the values
-                try:
-                    # rxn[side][rrCache._checkCIDdeprecated(spe[1], deprecatedCID_cid)] = DEFAULT_STOICHIO_RESCUE[spe[0]]
-                    rxn[side][spe[1]] = DEFAULT_STOICHIO_RESCUE[spe[0]]
-                except KeyError:
+                # (a lookup, plain numbers are the most frequent
+                # coeffs and would raise KeyError each time)
+                stoichio = DEFAULT_STOICHIO_RESCUE.get(coeff)
+                if stoichio is None:
                     # 2) try to convert to int if its not
                     try:
-                        # rxn[side][rrCache._checkCIDdeprecated(spe[1], deprecatedCID_cid)] = int(spe[0])
-                        rxn[side][spe[1]] = float(spe[0])
+                        stoichio = float(coeff)
                     except ValueError:
-                        ter = StreamHandler.terminator
-                        StreamHandler.terminator = "\n"
-                        logger.warning(
-                            f'Cannot convert stoichio coeff {spe[0]} in {rxn_id}'
+                        rrCache._warning(
+                            logger,
+                            f'Cannot convert stoichio coeff {coeff} in {rxn_id}'
                         )
-                        StreamHandler.terminator = ter
                         # Stop parsing this equation and pass the next
                         return None
+                # rxn[side][rrCache._checkCIDdeprecated(spe, deprecatedCID_cid)] = stoichio
+                # Species recur across equations, intern them
+                rxn[side][intern(spe)] = stoichio
 
         return {
             'left': rxn[0],
@@ -1276,6 +2036,15 @@ class rrCache:
     #  @return odepic generated depictions, {"otype1": "odepic1", ..}
     @staticmethod
     def _convert_depiction(idepic, itype='smiles', otype={'inchikey'}):
+        # Same depictions recur across input files, memoize the conversions
+        # (copy the result so that callers cannot alter the memoized one)
+        return dict(
+            rrCache.__convert_depiction(idepic, itype, frozenset(otype))
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=DEPICTION_CACHE_SIZE)
+    def __convert_depiction(idepic, itype, otype):
         # Import (if needed)
         if itype == 'smiles':
             rdmol = MolFromSmiles(idepic, sanitize=True)
@@ -1304,6 +2073,66 @@ class rrCache:
         return odepic
 
 
+    # Convert a batch of chemical depictions in parallel
+    #
+    #  @param idepics String depictions to be converted, [str, ..]
+    #  @param itype type of depictions provided as input, str
+    #  @param otype types of depiction to be generated, {"", "", ..}
+    #  @param max_workers Max number of processes (all cores by default)
+    #  @return odepics generated depictions (or DepictionError) by input depiction,
+    #          {"idepic1": {"otype1": "odepic1", ..}, ..}
+    @staticmethod
+    def _convert_depictions(idepics, itype='smiles', otype={'inchikey'}, max_workers=None):
+        # Convert each distinct depiction only once
+        idepics = list(dict.fromkeys(idepics))
+        if not idepics:
+            return {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            odepics = executor.map(
+                partial(
+                    rrCache._try_convert_depiction,
+                    itype=itype,
+                    otype=otype
+                ),
+                idepics,
+                chunksize=DEPICTION_CHUNK_SIZE
+            )
+            return dict(zip(idepics, odepics))
+
+    ## Method to tell how the structure of a compound can be completed
+    #
+    #  @param strc Compound structure
+    #  @return (depiction to convert from, depictions to convert to),
+    #          the former is '' if the compound has neither InChI nor SMILES
+    @staticmethod
+    def _depiction_types(strc: Dict) -> Tuple[str, Set[str]]:
+        # check to see if the inchikey is valid or not
+        otype = set({})
+        if not strc['inchikey']:
+            otype.add('inchikey')
+        if not strc['smiles']:
+            otype.add('smiles')
+        if not strc['inchi']:
+            otype.add('inchi')
+        itype = ''
+        # Check if the current compound has
+        # InChI or SMILES description
+        if strc['inchi']:
+            itype = 'inchi'
+        elif strc['smiles']:
+            itype = 'smiles'
+        return itype, otype
+
+    # Same as _convert_depiction() but returns the DepictionError
+    # instead of raising it, to be mapped over a pool of processes
+    @staticmethod
+    def _try_convert_depiction(idepic, itype='smiles', otype={'inchikey'}):
+        try:
+            return rrCache._convert_depiction(idepic, itype, otype)
+        except rrCache.DepictionError as e:
+            return e
+
+
     # Function to parse the chem_xref.tsv file of MetanetX
     #
     #  Generate a dictionnary of all cross references
@@ -1317,12 +2146,11 @@ class rrCache:
     #       there rp_paths uses an old version of MNX
     @staticmethod
     def _m_chebi_cid(cid_xref):
-        chebi_cid = {}
-        for cid in cid_xref:
-            if 'chebi' in cid_xref[cid]:
-                for c in cid_xref[cid]['chebi']:
-                    chebi_cid[c] = cid
-        return chebi_cid
+        return {
+            c: cid
+            for cid, xref in cid_xref.items()
+            for c in xref.get('chebi', ())
+        }
 
     # Function to build the dictionnary to find the chemical id from inchikey
     #
@@ -1331,14 +2159,9 @@ class rrCache:
     # @return Dictionnary of InChIKey to chemical ID
     @staticmethod
     def _m_inchikey_cid(cid_strc):
-        inchikey_cid = {}
-        for cid in cid_strc:
-            inchikey = cid_strc[cid]['inchikey']
-            # This line is needed to put a value in 'inchikey',
+        inchikey_cid = defaultdict(list)
+        for cid, strc in cid_strc.items():
+            # 'NO_INCHIKEY' is needed to put a value in 'inchikey',
             # otherwise there are some problems in future strucutres
-            if not inchikey:
-                inchikey = 'NO_INCHIKEY'
-            if inchikey not in inchikey_cid:
-                inchikey_cid[inchikey] = []
-            inchikey_cid[inchikey].append(cid)
-        return inchikey_cid
+            inchikey_cid[strc['inchikey'] or 'NO_INCHIKEY'].append(cid)
+        return dict(inchikey_cid)
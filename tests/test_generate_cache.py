@@ -0,0 +1,338 @@
+"""
+Tests of the generation of rrCache files from (tiny) input files.
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from threading import Lock
+from time import sleep
+from gzip import open as gzip_open
+from os import (
+    makedirs,
+    stat as os_stat,
+    path as os_path
+)
+from rr_cache import rrCache
+
+MNX_VERSION = 'test'
+
+# Input files, small enough to generate the cache in a few seconds
+INPUTS = {
+    'chem_xref.tsv': [
+        '#source\tID\tdescription',
+        'deprecated:MNXM5\tMNXM1\t',
+        'chebi:15377\tMNXM1\twater',
+        'MNXM1\tMNXM1\twater',
+        'MNXM2\tMNXM2\tethanol',
+    ],
+    'compounds.tsv.gz': [
+        'cid\tinchi',
+        'MNXM1\tInChI=1S/H2O/h1H2',
+    ],
+    'chem_prop.tsv': [
+        '#ID\tname\treference\tformula\tcharge\tmass\tInChI\tInChIKey\tSMILES',
+        'MNXM2\tethanol\tref\tC2H6O\t0\t46\tInChI=1S/C2H6O/c1-2-3/h3H,2H2,1H3\t\tCCO',
+    ],
+    'MNXM_replacement_20190524.csv': [
+        '# ID replacement',
+        'MNXM3 MNXM1',
+    ],
+    'reac_xref.tsv': [
+        '#source\tID\tdescription',
+        'deprecated:MNXR9\tMNXR1\t',
+        'kegg.reaction:R00001\tMNXR1\t',
+    ],
+    'retrorules_rr02_flat_all.tsv.gz': [
+        '# Rule_ID\tReaction_ID\tSubstrate_ID\tProduct_IDs\tScore_normalized\tRule_relative_direction',
+        'RR-02-a-16-F\tMNXR1\tMNXM2\tMNXM1\t0.5\t1',
+    ],
+    'comp_xref.tsv': [
+        '#source\tID\tdescription',
+        'bigg.compartment:c\tMNXC3\tcytoplasm',
+    ],
+    'rxn_recipes.tsv.gz': [
+        '#Reaction_ID\tEquation\tDirection\tMain_left\tMain_right',
+        'MNXR1\t1 MNXM2@MNXD1 = 1 MNXM1@MNXD1\t0\tMNXM2\tMNXM1',
+    ],
+}
+
+# Generation steps, with the steps they depend on
+STEPS = {
+    '_gen_deprecatedCID_cid': [],
+    '_gen_deprecatedRID_rid': [],
+    '_gen_rr_reactions': [],
+    '_gen_comp_xref_deprecatedCompID_compid': [],
+    '_gen_template_reactions': ['_gen_deprecatedRID_rid'],
+    '_gen_cid_strc_cid_name': ['_gen_deprecatedCID_cid'],
+    '_gen_cid_xref': ['_gen_deprecatedCID_cid'],
+    '_gen_chebi_cid': ['_gen_cid_xref'],
+    '_gen_inchikey_cid': ['_gen_cid_strc_cid_name'],
+}
+
+
+class Test_generate_cache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.outdir = self.tmpdir.name
+        self.input_dir = os_path.join(
+            self.outdir, 'input-cache', f'mnx_{MNX_VERSION}'
+        )
+        self.cache_dir = os_path.join(
+            self.outdir, 'cache', f'mnx_{MNX_VERSION}'
+        )
+        makedirs(self.input_dir)
+        for filename, lines in INPUTS.items():
+            self._write_input(filename, lines)
+        # Input files are already there
+        target = patch.object(rrCache, '_download_input_cache', return_value='0')
+        target.start()
+        self.addCleanup(target.stop)
+        # Events ('start' or 'end', step name) in order
+        self.events = []
+        self.events_lock = Lock()
+        self._spy_steps()
+
+    def _spy_steps(self):
+        # Steps run in threads so that they can be spied on
+        target = patch('rr_cache.rr_cache.ProcessPoolExecutor', ThreadPoolExecutor)
+        target.start()
+        self.addCleanup(target.stop)
+        for step in STEPS:
+            target = patch.object(
+                rrCache, step,
+                side_effect=self._spy(step, getattr(rrCache, step))
+            )
+            target.start()
+            self.addCleanup(target.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_input(self, filename, lines):
+        filename = os_path.join(self.input_dir, filename)
+        if filename.endswith('.gz'):
+            fp = gzip_open(filename, 'wt')
+        else:
+            fp = open(filename, 'w')
+        with fp:
+            fp.write('\n'.join(lines)+'\n')
+
+    def _spy(self, step, gen):
+        def _gen(*args, **kwargs):
+            with self.events_lock:
+                self.events.append(('start', step))
+            res = gen(*args, **kwargs)
+            with self.events_lock:
+                self.events.append(('end', step))
+            return res
+        return _gen
+
+    def _generate(self, attrs=None):
+        self.events.clear()
+        rrCache.generate_cache(self.outdir, MNX_VERSION, attrs=attrs)
+
+    def _cache_file(self, attr):
+        return os_path.join(
+            self.cache_dir,
+            rrCache._rrCache__cache[attr]['file']['name']
+        )
+
+    def test_steps_order(self):
+        r"""Test that each step starts once the steps it depends on are done.
+
+        Method: Generate the full cache. Then, for each step, compare when it
+        started with when the steps it depends on ended.
+        """
+        self._generate()
+        self.assertCountEqual(
+            [step for event, step in self.events if event == 'start'],
+            STEPS
+        )
+        for step, deps in STEPS.items():
+            for dep in deps:
+                with self.subTest(step=step, dep=dep):
+                    self.assertLess(
+                        self.events.index(('end', dep)),
+                        self.events.index(('start', step))
+                    )
+        for attr in rrCache._rrCache__attributes_list:
+            with self.subTest(attr=attr):
+                self.assertTrue(os_path.exists(self._cache_file(attr)))
+
+    def test_steps_not_delayed(self):
+        r"""Test that a step does not wait for steps it does not depend on.
+
+        Method: Generate the full cache with a slow 'deprecatedRID_rid' step.
+        Then, check that the 'cid_strc' and 'cid_xref' steps started before
+        it ended.
+        """
+        gen = rrCache._gen_deprecatedRID_rid
+
+        def _slow_gen(*args, **kwargs):
+            sleep(1)
+            return gen(*args, **kwargs)
+
+        with patch.object(rrCache, '_gen_deprecatedRID_rid', side_effect=_slow_gen):
+            self._generate()
+        for step in ['_gen_cid_strc_cid_name', '_gen_cid_xref']:
+            with self.subTest(step=step):
+                self.assertLess(
+                    self.events.index(('start', step)),
+                    self.events.index(('end', '_gen_deprecatedRID_rid'))
+                )
+
+    def test_attrs_subset(self):
+        r"""Test that only requested attributes and their dependencies are generated.
+
+        Method: Generate 'chebi_cid' only. Then, check that only the steps
+        it depends on have run and only their files have been written.
+        """
+        self._generate(['chebi_cid'])
+        self.assertCountEqual(
+            [step for event, step in self.events if event == 'start'],
+            ['_gen_deprecatedCID_cid', '_gen_cid_xref', '_gen_chebi_cid']
+        )
+        for attr in rrCache._rrCache__attributes_list:
+            with self.subTest(attr=attr):
+                self.assertEqual(
+                    os_path.exists(self._cache_file(attr)),
+                    attr in ('deprecatedCID_cid', 'cid_xref', 'chebi_cid')
+                )
+
+    def test_unchanged_inputs(self):
+        r"""Test that cache files are not generated again from unchanged inputs.
+
+        Method: Generate the full cache twice and check that no file has been
+        written the second time. Then, modify an input file and check that
+        only the files generated from it are written again.
+        """
+        self._generate()
+        with patch.object(
+            rrCache, '_store_cache_to_file',
+            wraps=rrCache._store_cache_to_file
+        ) as store:
+            self._generate()
+            store.assert_not_called()
+            self._write_input('comp_xref.tsv', INPUTS['comp_xref.tsv']+[
+                'bigg.compartment:e\tMNXC2\textracellular'
+            ])
+            self._generate()
+            self.assertCountEqual(
+                [call.args[1] for call in store.call_args_list],
+                [
+                    self._cache_file('comp_xref'),
+                    self._cache_file('deprecatedCompID_compid')
+                ]
+            )
+
+
+class Test_generate_cache_processes(Test_generate_cache):
+    r"""Same tests, with steps run in worker processes.
+
+    Steps cannot be spied on in other processes, only
+    what the cache generation writes is checked.
+    """
+
+    def _spy_steps(self):
+        pass
+
+    def test_steps_order(self):
+        r"""Test that the full cache is generated by worker processes.
+
+        Method: Generate the full cache. Then, check that every cache file
+        has been written and can be loaded.
+        """
+        self._generate()
+        for attr in rrCache._rrCache__attributes_list:
+            with self.subTest(attr=attr):
+                self.assertIsInstance(
+                    rrCache._load_cache_from_file(self._cache_file(attr)),
+                    dict
+                )
+        self.assertIn(
+            'MNXM1',
+            rrCache._load_cache_from_file(self._cache_file('cid_strc'))
+        )
+
+    def test_steps_not_delayed(self):
+        self.skipTest('Steps cannot be spied on in worker processes')
+
+    def test_unchanged_inputs(self):
+        r"""Test that cache files are not generated again from unchanged inputs.
+
+        Method: Generate the full cache twice with worker processes and check
+        that no file has been modified the second time. Then, modify an input
+        file and check that only the files generated from it are modified.
+        """
+        def _mtimes():
+            return {
+                attr: os_stat(self._cache_file(attr)).st_mtime_ns
+                for attr in rrCache._rrCache__attributes_list
+            }
+
+        self._generate()
+        mtimes = _mtimes()
+        self._generate()
+        self.assertDictEqual(_mtimes(), mtimes)
+        self._write_input('comp_xref.tsv', INPUTS['comp_xref.tsv']+[
+            'bigg.compartment:e\tMNXC2\textracellular'
+        ])
+        self._generate()
+        self.assertCountEqual(
+            [
+                attr for attr, mtime in _mtimes().items()
+                if mtime != mtimes[attr]
+            ],
+            ['comp_xref', 'deprecatedCompID_compid']
+        )
+
+    def test_attrs_subset(self):
+        r"""Test that only requested attributes and their dependencies are generated.
+
+        Method: Generate 'chebi_cid' only with worker processes. Then, check
+        that only the files it depends on have been written.
+        """
+        self._generate(['chebi_cid'])
+        for attr in rrCache._rrCache__attributes_list:
+            with self.subTest(attr=attr):
+                self.assertEqual(
+                    os_path.exists(self._cache_file(attr)),
+                    attr in ('deprecatedCID_cid', 'cid_xref', 'chebi_cid')
+                )
+
+
+class Test_m_mnxm_strc(TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.compounds = os_path.join(self.tmpdir.name, 'compounds.tsv.gz')
+        with gzip_open(self.compounds, 'wt') as f:
+            f.write('\n'.join(INPUTS['compounds.tsv.gz'])+'\n')
+        self.chem_prop = os_path.join(self.tmpdir.name, 'chem_prop.tsv')
+
+    def test_truncated_row(self):
+        r"""Test that truncated chem_prop rows are skipped.
+
+        Method: Parse a chem_prop file with a row missing its last columns
+        after a complete one. Then, check that the truncated compound is not
+        stored, neither with its own fields nor with those of the previous
+        row.
+        """
+        with open(self.chem_prop, 'w') as f:
+            f.write('\n'.join(INPUTS['chem_prop.tsv']+[
+                '',
+                'MNXM3\tmethane\tref\tCH4\t0\t16\tInChI=1S/CH4/h1H4',
+            ])+'\n')
+        cid_strc, cid_name = rrCache._m_mnxm_strc(
+            self.compounds, self.chem_prop, {}
+        )
+        self.assertEqual(cid_name.get('MNXM2'), 'ethanol')
+        self.assertNotIn('MNXM3', cid_name)
+        for strc in cid_strc.values():
+            with self.subTest(strc=strc):
+                self.assertNotEqual(strc.get('name'), 'methane')
+                self.assertNotEqual(strc.get('inchi'), 'InChI=1S/CH4/h1H4')
@@ -12,7 +12,16 @@ from os import (
 )
 from logging import Logger
 from json import load as json_load
+from gzip import open as gzip_open
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+from pickle import dumps as pickle_dumps
+from unittest.mock import patch, MagicMock
+from hashlib import sha512
+from os import listdir
 from rr_cache import rrCache
+from rr_cache.rr_cache import FileCorruptedError
 from brs_utils import (
     create_logger,
     extract_gz,
@@ -136,3 +145,199 @@ class Test_rrCache(TestCase):
             len(cache.get_list_of_reaction_rules()),
             self.metrics['rr_reactions']['length']
         )
+
+
+class Test_rrCache_lazy_loading(TestCase):
+
+    cid_strc = {
+        'MNXM1': {
+            'formula': 'H2O',
+            'smiles': 'O',
+            'inchi': 'InChI=1S/H2O/h1H2',
+            'inchikey': 'XLYOFNOQVPJJNP-UHFFFAOYSA-N',
+            'cid': 'MNXM1',
+            'name': 'water'
+        }
+    }
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        rrCache._store_cache_to_file(
+            self.cid_strc,
+            self._cache_file('cid_strc')
+        )
+        # Cache files are already there
+        target = patch.object(rrCache, '_check_or_download_cache_to_disk')
+        target.start()
+        self.addCleanup(target.stop)
+        self.cache = rrCache(attrs=None, cache_dir=self.tmpdir.name)
+
+    def _cache_file(self, attr):
+        return os_path.join(
+            self.tmpdir.name,
+            rrCache._rrCache__cache_filenames[attr]
+        )
+
+    def test_lazy_loading(self):
+        r"""Test that cache files are loaded on first access only.
+
+        Method: Load two attributes and check that no file is read. Then,
+        get one of them twice and check that only its file has been read,
+        once.
+        """
+        with patch.object(
+            rrCache, '_load_cache_from_file',
+            wraps=rrCache._load_cache_from_file
+        ) as load:
+            self.cache.load(['cid_strc', 'cid_name'])
+            load.assert_not_called()
+            self.assertDictEqual(self.cache.get('cid_strc'), self.cid_strc)
+            self.assertDictEqual(self.cache.get('cid_strc'), self.cid_strc)
+            load.assert_called_once()
+            self.assertEqual(load.call_args.args[0], self._cache_file('cid_strc'))
+        self.assertIsNone(self.cache.get('rr_reactions'))
+
+    def test_concurrent_get(self):
+        r"""Test that a cache file is loaded once by concurrent accesses.
+
+        Method: Get an attribute from several threads while its file is
+        (slowly) loaded. Then, check that the file has been read once and
+        that all threads got the same data.
+        """
+        load_cache_from_file = rrCache._load_cache_from_file
+
+        def _slow_load(*args):
+            sleep(0.1)
+            return load_cache_from_file(*args)
+
+        self.cache.load(['cid_strc'])
+        results = []
+        with patch.object(
+            rrCache, '_load_cache_from_file',
+            side_effect=_slow_load
+        ) as load:
+            threads = [
+                Thread(target=lambda: results.append(self.cache.get('cid_strc')))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            load.assert_called_once()
+        self.assertEqual(len(results), 8)
+        for result in results:
+            self.assertIs(result, results[0])
+
+    def test_load_error(self):
+        r"""Test that a cache file that cannot be read fails on first access.
+
+        Method: Load an attribute whose file is missing, then one whose file
+        is not valid JSON, and check that the first get() raises. Then, fix
+        the file and check that the next get() loads it.
+        """
+        self.cache.load(['cid_name', 'cid_strc'])
+        with self.assertRaises(OSError):
+            self.cache.get('cid_name')
+        with gzip_open(self._cache_file('cid_strc'), 'wt') as f:
+            f.write('{"MNXM1": ')
+        with self.assertRaises(ValueError):
+            self.cache.get('cid_strc')
+        rrCache._store_cache_to_file(
+            self.cid_strc,
+            self._cache_file('cid_strc')
+        )
+        self.assertDictEqual(self.cache.get('cid_strc'), self.cid_strc)
+
+    def test_pickle_copy(self):
+        r"""Test that the binary copy of a cache file is tied to its fingerprint.
+
+        Method: Load a file with its fingerprint and check that a copy is
+        written and loaded the next time instead of the file. Then, check
+        that no copy is written without a fingerprint or with a wrong one,
+        and that a copy which would run code when unpickled is ignored.
+        """
+        filename = self._cache_file('cid_strc')
+        pickle_filename = filename+'.pickle'
+        sha = rrCache._sha512sum(filename)
+        self.assertDictEqual(
+            rrCache._load_cache_from_file(filename, 'wrong'),
+            self.cid_strc
+        )
+        self.assertDictEqual(
+            rrCache._load_cache_from_file(filename),
+            self.cid_strc
+        )
+        self.assertFalse(os_path.exists(pickle_filename))
+        rrCache._load_cache_from_file(filename, sha)
+        self.assertTrue(os_path.exists(pickle_filename))
+        with patch.object(rrCache, '_load_json') as load_json:
+            self.assertDictEqual(
+                rrCache._load_cache_from_file(filename, sha),
+                self.cid_strc
+            )
+            load_json.assert_not_called()
+        with open(pickle_filename, 'rb') as f:
+            signature, _ = rrCache._DataUnpickler(f).load()
+        # Runs print() if unpickled with the standard unpickler
+        with open(pickle_filename, 'wb') as f:
+            f.write(pickle_dumps((signature, Test_rrCache_payload())))
+        with patch('builtins.print') as payload:
+            self.assertDictEqual(
+                rrCache._load_cache_from_file(filename, sha),
+                self.cid_strc
+            )
+            payload.assert_not_called()
+
+
+class Test_rrCache_download(TestCase):
+
+    content = b'{"MNXM1": "water"}'
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.filename = os_path.join(self.tmpdir.name, 'cid_name.json.gz')
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [self.content]
+        session = MagicMock()
+        session.get.return_value = response
+        target = patch.object(rrCache, '_http_session', return_value=session)
+        target.start()
+        self.addCleanup(target.stop)
+
+    def test_download(self):
+        r"""Test that a downloaded file is kept when it is the expected one.
+
+        Method: Download a file with its fingerprint and check that it is
+        written, with no temporary file left.
+        """
+        sha = sha512(self.content).hexdigest()
+        self.assertEqual(
+            rrCache._download('https://host/cid_name.json.gz', self.filename, sha),
+            sha
+        )
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(listdir(self.tmpdir.name), ['cid_name.json.gz'])
+
+    def test_download_corrupted(self):
+        r"""Test that a downloaded file is dropped when it is not the expected one.
+
+        Method: Download a file with another fingerprint than its own and
+        check that FileCorruptedError is raised, and that neither the file
+        nor a temporary file is left.
+        """
+        with self.assertRaises(FileCorruptedError):
+            rrCache._download(
+                'https://host/cid_name.json.gz', self.filename, 'wrong'
+            )
+        self.assertEqual(listdir(self.tmpdir.name), [])
+
+
+class Test_rrCache_payload:
+
+    def __reduce__(self):
+        return (print, ('payload',))